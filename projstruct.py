@@ -1,13 +1,33 @@
+import bisect
+import io
 import os
+import re
 import subprocess
 import sys
 import shutil
-import re
-from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+
+# Box glyphs that make up tree drawing prefixes (along with any whitespace)
+_TREE_GLYPHS = '│├└─'
+
+# Substrings that suggest pasted source code rather than a tree structure
+_CODE_INDICATORS = (
+    'def ', 'class ', 'import ', 'function ', 'const ', 'let ', 'var ',
+    '#!/usr/bin', 'if __name__', 'public class', 'void main'
+)
+_CODE_INDICATOR_RE = re.compile('|'.join(map(re.escape, _CODE_INDICATORS)))
+
+# Below this many files a thread pool costs more than it saves
+_PARALLEL_FILE_THRESHOLD = 64
 
 
 def get_project_name():
-    """Prompt for project name."""
+    """
+    Prompt for project name and create its folder.
+    Returns the name and the topmost folder created for it, which is what
+    must be removed if the run is abandoned.
+    """
     print("\n" + "="*50)
     print("   ProjStruct - Universal Project Scaffolder")
     print("="*50 + "\n")
@@ -16,14 +36,41 @@ def get_project_name():
         name = input("Project name: ").strip()
         if not name:
             print("ERROR: Project name cannot be empty.")
-        elif os.path.exists(name):
+            continue
+        name = os.path.normpath(name)
+        
+        # Nested names like apps/web need their parents first; remember the
+        # topmost missing one so it can be removed again
+        created_root = name
+        parent = os.path.dirname(name)
+        while parent and not os.path.exists(parent):
+            created_root = parent
+            parent = os.path.dirname(parent)
+        
+        if created_root != name:
+            try:
+                os.makedirs(os.path.dirname(name))
+            except OSError as e:
+                print(f"ERROR: Couldn't create folder '{e.filename}': {e.strerror}")
+                if os.path.isdir(created_root):
+                    shutil.rmtree(created_root)
+                continue
+        
+        try:
+            os.mkdir(name)
+        except FileExistsError:
             print(f"ERROR: Folder '{name}' already exists.")
+        except OSError as e:
+            print(f"ERROR: Couldn't create folder '{e.filename}': {e.strerror}")
         else:
-            return name
+            return name, created_root
+        
+        if created_root != name:
+            shutil.rmtree(created_root)
 
 
 def get_tree_input():
-    """Get tree structure from user."""
+    """Get tree structure lines from user (blank lines dropped)."""
     print("\nPaste your project structure (tree format).")
     print("Press Enter twice when done:\n")
     
@@ -43,53 +90,59 @@ def get_tree_input():
         except EOFError:
             break
     
-    tree_text = '\n'.join(lines)
-    
     # Validate that this looks like a tree structure, not code
-    if tree_text.strip():
-        code_indicators = [
-            'def ', 'class ', 'import ', 'function ', 'const ', 'let ', 'var ',
-            '#!/usr/bin', 'if __name__', 'public class', 'void main'
-        ]
-        
-        if any(indicator in tree_text for indicator in code_indicators):
-            print("\nERROR: This looks like code, not a project structure.")
-            print("Please paste a tree structure like:")
-            print("  lib/")
-            print("    main.dart")
-            print("  test/")
-            print("    test.dart\n")
-            return None
+    if any(_CODE_INDICATOR_RE.search(line) for line in lines):
+        print("\nERROR: This looks like code, not a project structure.")
+        print("Please paste a tree structure like:")
+        print("  lib/")
+        print("    main.dart")
+        print("  test/")
+        print("    test.dart\n")
+        return None
     
-    return tree_text
+    return lines
 
 
-def parse_tree_structure(tree_text):
+def parse_tree_structure(tree):
     """
     Parse a tree structure into properly nested paths.
+    Accepts the tree as text or as an already split list of lines.
     No content added to files - just creates the structure.
     """
-    lines = tree_text.strip().split('\n')
+    if isinstance(tree, str):
+        tree = io.StringIO(tree, newline=None)
+    
     paths = []
-    dir_stack = []
+    indents = []    # Indent of each open directory (strictly increasing)
+    dir_stack = []  # Prefix length before each open directory was pushed
+    prefix = ''
+    first = True
     
-    for i, line in enumerate(lines):
+    for line in tree:
+        line = line.rstrip('\n')
         if not line.strip():
             continue
         
-        # Measure indent by replacing tree chars with spaces
-        line_normalized = line.replace('├──', '   ').replace('└──', '   ').replace('│', ' ').replace('─', ' ')
-        indent = len(line_normalized) - len(line_normalized.lstrip())
+        is_first, first = first, False
+        
+        # Measure indent as the length of the tree prefix
+        stripped = line
+        while True:
+            rest = stripped.lstrip(_TREE_GLYPHS).lstrip()
+            if rest == stripped:
+                break
+            stripped = rest
+        indent = len(line) - len(stripped)
         
         # Extract the name
-        cleaned = re.sub(r'^[│├└─\s]+', '', line).strip()
+        cleaned = stripped.strip()
         
         if not cleaned or cleaned.startswith('#'):
             continue
         
         # Remove comments (everything after # until double space or end)
         if '#' in cleaned:
-            cleaned = cleaned.split('#')[0].strip()
+            cleaned = cleaned.split('#', 1)[0].strip()
         
         if not cleaned:
             continue
@@ -99,30 +152,37 @@ def parse_tree_structure(tree_text):
         name = cleaned.rstrip('/')
         
         # Skip project root (first line that's a single dir)
-        if i == 0 and is_dir and '/' not in name:
+        if is_first and is_dir and '/' not in name:
             continue
         
         # Pop directories from stack that are at same or deeper level
-        while dir_stack and dir_stack[-1][0] >= indent:
-            dir_stack.pop()
+        cut = bisect.bisect_left(indents, indent)
+        if cut < len(dir_stack):
+            prefix = prefix[:dir_stack[cut]]
+            del dir_stack[cut:]
+            del indents[cut:]
         
-        # Build full path from stack
-        if dir_stack:
-            path_parts = [d[1] for d in dir_stack] + [name]
-            full_path = '/'.join(path_parts)
-        else:
-            full_path = name
+        # Build full path from the current directory prefix
+        full_path = prefix + name
         
         # Add to results
         if is_dir:
             paths.append(full_path + '/')
-            dir_stack.append((indent, name))
+            indents.append(indent)
+            dir_stack.append(len(prefix))
+            prefix = full_path + '/'
         else:
             paths.append(full_path)
     
     return paths
 
 
+def _create_empty_file(file_path):
+    """Create a single empty file whose parent directory already exists."""
+    fd = os.open(file_path, os.O_WRONLY | os.O_CREAT, 0o666)
+    os.close(fd)
+
+
 def create_structure(project_name, paths):
     """Create folders and empty files from parsed paths."""
     print(f"\nCreating project structure...")
@@ -130,25 +190,41 @@ def create_structure(project_name, paths):
     created_files = []
     created_dirs = []
     
+    # Collect every directory needed (explicit ones and file parents)
+    needed_dirs = set()
     for path in paths:
-        full_path = os.path.join(project_name, path)
-        
-        # Check if it's a directory
-        is_dir = path.endswith('/')
-        
-        if is_dir:
-            # Create directory
+        if path.endswith('/'):
             path_clean = path.rstrip('/')
-            full_path = os.path.join(project_name, path_clean)
-            os.makedirs(full_path, exist_ok=True)
+            needed_dirs.add(path_clean)
             created_dirs.append(path_clean)
         else:
-            # Create file (empty)
-            os.makedirs(os.path.dirname(full_path), exist_ok=True)
-            with open(full_path, 'w') as f:
-                pass  # Create empty file
+            parent = os.path.dirname(path)
+            if parent:
+                needed_dirs.add(parent)
             created_files.append(path)
     
+    # Only leaf directories need a makedirs call - it creates the ancestors
+    ancestors = set()
+    for d in needed_dirs:
+        parent = os.path.dirname(d)
+        while parent and parent not in ancestors:
+            ancestors.add(parent)
+            parent = os.path.dirname(parent)
+    
+    for d in needed_dirs - ancestors:
+        os.makedirs(os.path.join(project_name, d), exist_ok=True)
+    
+    # Create files (empty) - parents already exist, so they are independent
+    file_paths = [os.path.join(project_name, path) for path in created_files]
+    if len(file_paths) > _PARALLEL_FILE_THRESHOLD:
+        with ThreadPoolExecutor(max_workers=32) as executor:
+            futures = [executor.submit(_create_empty_file, fp) for fp in file_paths]
+            for future in as_completed(futures):
+                future.result()  # Re-raise any creation error
+    else:
+        for fp in file_paths:
+            _create_empty_file(fp)
+    
     print(f"   Created {len(created_dirs)} directories")
     print(f"   Created {len(created_files)} files")
     
@@ -157,13 +233,16 @@ def create_structure(project_name, paths):
 
 def open_in_vscode(project_name):
     """Open the project in VS Code."""
+    code_bin = shutil.which("code")
+    if code_bin is None:
+        print("\nWARNING: VS Code ('code' command) not found.")
+        return False
+    
     try:
-        subprocess.run(["code", project_name], check=True)
+        # The launcher hands off to VS Code, so don't wait on it
+        subprocess.Popen([code_bin, project_name])
         print(f"\nOpened '{project_name}' in VS Code!")
         return True
-    except FileNotFoundError:
-        print("\nWARNING: VS Code ('code' command) not found.")
-        return False
     except Exception:
         print("\nWARNING: Couldn't open VS Code automatically.")
         return False
@@ -188,20 +267,20 @@ def main():
     """Main function."""
     try:
         # Get project details
-        project_name = get_project_name()
-        tree_text = get_tree_input()
+        project_name, created_root = get_project_name()
+        tree_lines = get_tree_input()
         
         # Check if input validation failed
-        if tree_text is None:
+        if tree_lines is None:
             print("Please try again with a valid project structure.")
             sys.exit(1)
         
-        if not tree_text.strip():
+        if not tree_lines:
             print("\nERROR: No structure provided. Exiting.")
             sys.exit(1)
         
         # Parse structure
-        paths = parse_tree_structure(tree_text)
+        paths = parse_tree_structure(tree_lines)
         
         if not paths:
             print("\nERROR: Could not parse project structure.")
@@ -214,8 +293,6 @@ def main():
         open_vscode = input("\nOpen in VS Code when done? (y/n): ").strip().lower() == 'y'
         
         # Create project
-        os.makedirs(project_name, exist_ok=True)
-        
         create_structure(project_name, paths)
         
         # Open in VS Code
@@ -226,15 +303,20 @@ def main():
         # Success message
         print_success(project_name, vscode_opened)
         
+    except SystemExit:
+        # Input was rejected after the project folders were created
+        if 'created_root' in locals() and os.path.exists(created_root):
+            shutil.rmtree(created_root)
+        raise
     except KeyboardInterrupt:
         print("\n\nERROR: Cancelled by user.")
-        if 'project_name' in locals() and os.path.exists(project_name):
-            shutil.rmtree(project_name)
+        if 'created_root' in locals() and os.path.exists(created_root):
+            shutil.rmtree(created_root)
         sys.exit(1)
     except Exception as e:
         print(f"\nERROR: {e}")
-        if 'project_name' in locals() and os.path.exists(project_name):
-            shutil.rmtree(project_name)
+        if 'created_root' in locals() and os.path.exists(created_root):
+            shutil.rmtree(created_root)
         sys.exit(1)
 
 